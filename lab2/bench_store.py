@@ -0,0 +1,57 @@
+import random
+import sys
+import time
+from store import InMemoryStore
+
+FIRST_NAMES = ["Ivan", "Petr", "Kirill", "Anna", "Maria", "Olga", "Sergey", "Dmitry", "Elena", "Nikolay"]
+LAST_NAMES = ["Ivanov", "Petrov", "Kotov", "Smirnov", "Kuznetsov", "Popov", "Sokolov", "Lebedev", "Morozov", "Volkov"]
+
+def make_user(i: int) -> dict:
+    return {
+        "id": i,
+        "username": f"user{i}",
+        "first_name": random.choice(FIRST_NAMES),
+        "last_name": f"{random.choice(LAST_NAMES)}{i % 10007}",
+        "hashed_password": "$2b$12$EixZaYVK1fsbw1ZfbX3OXePaWxn96p36WQoeG6Lruj3vjPGga31lW",
+        "email": f"user{i}@ozon.com",
+    }
+
+def timed(label: str, count: int, fn):
+    started = time.perf_counter()
+    for i in range(count):
+        fn(i)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<36} {elapsed / count * 1e6:>12.1f} us/op")
+
+# Прежняя реализация lab2: линейный проход по спискам
+def list_search(users, first_name, last_name):
+    return [
+        user for user in users
+        if first_name.lower() in user["first_name"].lower()
+        and last_name.lower() in user["last_name"].lower()
+    ]
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    random.seed(1)
+    users = [make_user(i) for i in range(count)]
+    print(f"{count} users")
+
+    store = InMemoryStore()
+    started = time.perf_counter()
+    for user in users:
+        store.add_user(user)
+    print(f"{'store: load':<36} {time.perf_counter() - started:>12.2f} s")
+
+    lookups = 1000
+    timed("list: get by username", 20, lambda i: next(u for u in users if u["username"] == f"user{count - 1 - i}"))
+    timed("store: get by username", lookups, lambda i: store.get_user_by_username(f"user{random.randrange(count)}"))
+    timed("list: search (ann, ov12)", 5, lambda i: list_search(users, "ann", "ov12"))
+    timed("store: search (ann, ov12)", 100, lambda i: store.search_users("ann", "ov12"))
+    timed("store: search (ivan, ivanov1234)", lookups, lambda i: store.search_users("ivan", "ivanov1234"))
+    timed("store: search (a, '') ", 3, lambda i: store.search_users("a", ""))
+    timed("store: add to cart", lookups, lambda i: store.add_cart_item(random.randrange(count), {"product_id": 1, "quantity": 1}))
+    timed("store: get cart", lookups, lambda i: store.get_cart(random.randrange(count)))
+
+if __name__ == "__main__":
+    main()
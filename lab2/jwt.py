@@ -5,6 +5,10 @@ from typing import List, Optional
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from store import InMemoryStore
+from persistence import StorePersistence
+from store_server import RemoteStore
+import os
 
 # Секретный ключ для подписи JWT
 SECRET_KEY = "your-secret-key"
@@ -24,9 +28,27 @@ client_db = {
     "admin": "$2b$12$EixZaYVK1fsbw1ZfbX3OXePaWxn96p36WQoeG6Lruj3vjPGga31lW"  # hashed "secret"
 }
 
-# Временное хранилище для пользователей и корзин
-users_db = []
-carts_db = []
+# Хранилище пользователей и корзин (с индексами, см. store.py).
+# local: данные в памяти процесса, только для одного воркера;
+# shared: данные в процессе store_server.py, общие для всех воркеров uvicorn
+STORE_BACKEND = os.getenv("STORE_BACKEND", "local")
+
+# Снапшоты и журнал изменений: после перезапуска состояние восстанавливается с диска
+STORE_DATA_DIR = os.getenv("STORE_DATA_DIR", "data")
+STORE_SNAPSHOT_INTERVAL = float(os.getenv("STORE_SNAPSHOT_INTERVAL", "300"))
+
+if STORE_BACKEND == "shared":
+    # Снапшоты и журнал ведёт процесс-владелец
+    store = RemoteStore()
+    store_persistence = None
+else:
+    store = InMemoryStore()
+    store_persistence = StorePersistence(store, STORE_DATA_DIR, snapshot_interval=STORE_SNAPSHOT_INTERVAL)
+
+@app.on_event("startup")
+def restore_store():
+    if store_persistence is not None:
+        store_persistence.start()
 
 # Модели данных
 class User(BaseModel):
@@ -103,51 +125,37 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
 # Создание нового пользователя
 @app.post("/users", response_model=User)
 def create_user(user: User, current_user: str = Depends(get_current_client)):
-    for u in users_db:
-        if u.id == user.id:
-            raise HTTPException(status_code=404, detail="User already exists")
-    users_db.append(user)
+    if not store.add_user(user.dict()):
+        raise HTTPException(status_code=404, detail="User already exists")
     return user
 
 # Поиск пользователя по логину
 @app.get("/users/{username}", response_model=User)
 def get_user_by_username(username: str, current_user: str = Depends(get_current_client)):
-    for user in users_db:
-        if user.username == username:
-            return user
-    raise HTTPException(status_code=404, detail="User not found")
+    user = store.get_user_by_username(username)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
 
 # Поиск пользователя по маске имени и фамилии
 @app.get("/users", response_model=List[User])
 def search_users_by_name(
     first_name: str, last_name: str, current_user: str = Depends(get_current_client)
 ):
-    matching_users = [
-        user
-        for user in users_db
-        if first_name.lower() in user.first_name.lower()
-        and last_name.lower() in user.last_name.lower()
-    ]
-    return matching_users
+    return store.search_users(first_name, last_name)
 
 # Добавление товара в корзину
 @app.post("/carts/{user_id}/items", response_model=Cart)
 def add_to_cart(user_id: int, item: CartItem, current_user: str = Depends(get_current_client)):
-    for cart in carts_db:
-        if cart.user_id == user_id:
-            cart.items.append(item)
-            return cart
-    new_cart = Cart(user_id=user_id, items=[item])
-    carts_db.append(new_cart)
-    return new_cart
+    return store.add_cart_item(user_id, item.dict())
 
 # Получение корзины для пользователя
 @app.get("/carts/{user_id}", response_model=Cart)
 def get_cart(user_id: int, current_user: str = Depends(get_current_client)):
-    for cart in carts_db:
-        if cart.user_id == user_id:
-            return cart
-    raise HTTPException(status_code=404, detail="Cart not found")
+    cart = store.get_cart(user_id)
+    if cart is None:
+        raise HTTPException(status_code=404, detail="Cart not found")
+    return cart
 
 # Запуск сервера
 if __name__ == "__main__":
@@ -0,0 +1,205 @@
+import gc
+import glob
+import marshal
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+from store import USER_FIELDS
+
+# Снапшот: заголовок и секции в формате marshal (быстрая загрузка на стороне C):
+# пользователи, корзины, имена в нижнем регистре, n-граммные индексы имени и фамилии
+SNAPSHOT_MAGIC = b"L2SNAP01"
+SNAPSHOT_HEADER = struct.Struct("<8sHQ5Q")  # magic, версия marshal, поколение журнала, длины секций
+
+# Журнал: [код операции][длина][marshal-данные], незавершённая последняя запись отбрасывается
+RECORD_HEADER = struct.Struct("<BI")
+OP_ADD_USER = 1
+OP_ADD_CART_ITEM = 2
+
+def write_snapshot(path: str, generation: int, users: list, carts: list,
+                   lower_names: dict, first_name_index: dict, last_name_index: dict):
+    sections = [marshal.dumps(section) for section in (users, carts, lower_names, first_name_index, last_name_index)]
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, marshal.version, generation, *map(len, sections)))
+        for section in sections:
+            f.write(section)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def snapshot_state(store):
+    users = [tuple(user[field] for field in USER_FIELDS) for user in store.users_by_id.values()]
+    carts = [
+        (user_id, [(item["product_id"], item["quantity"]) for item in cart["items"]])
+        for user_id, cart in store.carts_by_user_id.items()
+    ]
+    return users, carts, store.lower_names, store.first_name_index, store.last_name_index
+
+# Снапшоты и журнал изменений для InMemoryStore: снапшот пишет дочерний процесс
+# (fork, copy-on-write), запросы в это время продолжают обслуживаться, а новые
+# изменения идут в журнал следующего поколения
+class StorePersistence:
+    def __init__(self, store, data_dir: str, snapshot_interval: float = 300, fsync_interval: float = 1.0):
+        self.store = store
+        self.data_dir = data_dir
+        self.snapshot_path = os.path.join(data_dir, "snapshot.bin")
+        self.snapshot_interval = snapshot_interval
+        self.fsync_interval = fsync_interval
+        self.aof_lock = threading.Lock()
+        self.aof = None
+        self.generation = 0
+        self.changes = 0  # Изменений после последнего снапшота
+        self.snapshot_running = False
+
+    def aof_path(self, generation: int) -> str:
+        return os.path.join(self.data_dir, f"appendonly.{generation}.log")
+
+    def aof_generations(self) -> list:
+        generations = []
+        for path in glob.glob(os.path.join(self.data_dir, "appendonly.*.log")):
+            match = re.search(r"appendonly\.(\d+)\.log$", path)
+            if match:
+                generations.append(int(match.group(1)))
+        return sorted(generations)
+
+    def start(self):
+        os.makedirs(self.data_dir, exist_ok=True)
+        started = time.perf_counter()
+        self.load()
+        print(f"Store restored: {len(self.store)} users in {time.perf_counter() - started:.2f} s")
+        self.aof = open(self.aof_path(self.generation), "ab")
+        self.store.journal = self
+        threading.Thread(target=self.fsync_loop, daemon=True).start()
+        threading.Thread(target=self.snapshot_loop, daemon=True).start()
+
+    def load(self):
+        # Загрузка создаёт миллионы объектов разом; сборщик мусора на них только тратит время
+        gc.disable()
+        try:
+            if os.path.exists(self.snapshot_path):
+                self.load_snapshot()
+            for generation in self.aof_generations():
+                if generation >= self.generation:
+                    self.replay(generation)
+                    self.generation = generation
+        finally:
+            gc.enable()
+
+    def load_snapshot(self):
+        with open(self.snapshot_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            magic, marshal_version, generation, *lengths = SNAPSHOT_HEADER.unpack_from(mm, 0)
+            if magic != SNAPSHOT_MAGIC:
+                raise ValueError(f"{self.snapshot_path} is not a store snapshot")
+            if marshal_version != marshal.version:
+                raise ValueError(f"Snapshot marshal version {marshal_version}, expected {marshal.version}")
+            view = memoryview(mm)
+            offset = SNAPSHOT_HEADER.size
+            sections = []
+            for length in lengths:
+                sections.append(marshal.loads(view[offset:offset + length]))
+                offset += length
+            view.release()
+        self.store.restore(*sections)
+        self.generation = generation
+
+    def replay(self, generation: int):
+        path = self.aof_path(generation)
+        with open(path, "rb") as f:
+            data = f.read()
+        offset = 0
+        while offset + RECORD_HEADER.size <= len(data):
+            op, length = RECORD_HEADER.unpack_from(data, offset)
+            end = offset + RECORD_HEADER.size + length
+            if end > len(data):
+                break
+            payload = marshal.loads(data[offset + RECORD_HEADER.size:end])
+            if op == OP_ADD_USER:
+                self.store.add_user(dict(zip(USER_FIELDS, payload)))
+            elif op == OP_ADD_CART_ITEM:
+                user_id, product_id, quantity = payload
+                self.store.add_cart_item(user_id, {"product_id": product_id, "quantity": quantity})
+            offset = end
+        if offset < len(data):
+            # Обрезаем запись, оборванную при аварийной остановке, чтобы дописывать после неё
+            print(f"Truncating incomplete record at {path}:{offset}")
+            with open(path, "r+b") as f:
+                f.truncate(offset)
+
+    def append(self, op: int, payload):
+        data = marshal.dumps(payload)
+        with self.aof_lock:
+            self.aof.write(RECORD_HEADER.pack(op, len(data)) + data)
+            self.aof.flush()
+        self.changes += 1
+
+    def log_add_user(self, user: dict):
+        self.append(OP_ADD_USER, tuple(user[field] for field in USER_FIELDS))
+
+    def log_add_cart_item(self, user_id: int, item: dict):
+        self.append(OP_ADD_CART_ITEM, (user_id, item["product_id"], item["quantity"]))
+
+    def fsync_loop(self):
+        while True:
+            time.sleep(self.fsync_interval)
+            with self.aof_lock:
+                os.fsync(self.aof.fileno())
+
+    def snapshot_loop(self):
+        while True:
+            time.sleep(self.snapshot_interval)
+            if self.changes and not self.snapshot_running:
+                try:
+                    self.snapshot()
+                except Exception as e:
+                    print(f"Snapshot failed: {e}")
+
+    def snapshot(self):
+        self.snapshot_running = True
+        # Под блокировкой хранилища переключаем журнал на новое поколение и фиксируем состояние:
+        # снапшот поколения N содержит всё, что было до журнала N
+        with self.store.lock:
+            generation = self.generation + 1
+            with self.aof_lock:
+                self.aof.close()
+                self.aof = open(self.aof_path(generation), "ab")
+            self.generation = generation
+            self.changes = 0
+            if hasattr(os, "fork"):
+                pid = os.fork()
+                if pid == 0:
+                    code = 1
+                    try:
+                        write_snapshot(self.snapshot_path, generation, *snapshot_state(self.store))
+                        code = 0
+                    finally:
+                        os._exit(code)
+                state = None
+            else:
+                # Без fork копируем ссылки на данные и пишем снапшот в потоке
+                pid = None
+                users, carts, lower_names, first_index, last_index = snapshot_state(self.store)
+                state = (users, carts, dict(lower_names),
+                         {gram: set(ids) for gram, ids in first_index.items()},
+                         {gram: set(ids) for gram, ids in last_index.items()})
+        threading.Thread(target=self.finish_snapshot, args=(generation, pid, state), daemon=True).start()
+
+    def finish_snapshot(self, generation: int, pid, state):
+        try:
+            if pid is not None:
+                _, status = os.waitpid(pid, 0)
+                if status != 0:
+                    print(f"Snapshot process exited with status {status}")
+                    return
+            else:
+                write_snapshot(self.snapshot_path, generation, *state)
+            # Журналы, вошедшие в снапшот, больше не нужны
+            for old_generation in self.aof_generations():
+                if old_generation < generation:
+                    os.remove(self.aof_path(old_generation))
+            print(f"Snapshot written, journal generation {generation}")
+        finally:
+            self.snapshot_running = False
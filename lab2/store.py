@@ -0,0 +1,110 @@
+import threading
+
+# Длина n-грамм для поиска по подстроке имени и фамилии
+NGRAM = 3
+# Когда кандидатов мало, проверить подстроку дешевле, чем пересекать дальше
+SMALL_CANDIDATES = 64
+
+USER_FIELDS = ("id", "username", "first_name", "last_name", "hashed_password", "email")
+
+def ngrams(text: str) -> set:
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+# Хранилище в памяти с индексами: пользователи по id и логину, корзины по user_id,
+# n-граммы имён и фамилий в нижнем регистре для поиска по маске
+class InMemoryStore:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.users_by_id = {}
+        self.users_by_username = {}
+        self.carts_by_user_id = {}
+        self.order_by_id = {}  # Порядок добавления: результаты поиска выдаются в нём
+        self.lower_names = {}  # id -> (имя, фамилия) в нижнем регистре, считаются один раз
+        self.first_name_index = {}
+        self.last_name_index = {}
+        self.journal = None  # Журнал изменений (см. persistence.py), пишется под той же блокировкой
+
+    def __len__(self):
+        return len(self.users_by_id)
+
+    def add_user(self, user: dict) -> bool:
+        with self.lock:
+            user_id = user["id"]
+            if user_id in self.users_by_id:
+                return False
+            self.users_by_id[user_id] = user
+            # При совпадении логинов поиск возвращает первого добавленного, как раньше
+            self.users_by_username.setdefault(user["username"], user)
+            self.order_by_id[user_id] = len(self.order_by_id)
+            first_name, last_name = user["first_name"].lower(), user["last_name"].lower()
+            self.lower_names[user_id] = (first_name, last_name)
+            for gram in ngrams(first_name):
+                self.first_name_index.setdefault(gram, set()).add(user_id)
+            for gram in ngrams(last_name):
+                self.last_name_index.setdefault(gram, set()).add(user_id)
+            if self.journal is not None:
+                self.journal.log_add_user(user)
+            return True
+
+    def get_user_by_username(self, username: str):
+        return self.users_by_username.get(username)
+
+    def search_users(self, first_name: str, last_name: str) -> list:
+        first_name, last_name = first_name.lower(), last_name.lower()
+        with self.lock:
+            postings = [self.first_name_index.get(gram, set()) for gram in ngrams(first_name)]
+            postings += [self.last_name_index.get(gram, set()) for gram in ngrams(last_name)]
+            if postings:
+                # Начинаем с самого короткого списка по обоим полям; пересечение
+                # обходит меньшее множество, поэтому стоимость близка к размеру результата
+                postings.sort(key=len)
+                candidates = postings[0]
+                for ids in postings[1:]:
+                    if len(candidates) <= SMALL_CANDIDATES:
+                        break
+                    candidates = candidates & ids
+            else:
+                # Запрос короче n-граммы: проходим по готовым строкам в нижнем регистре
+                candidates = self.lower_names.keys()
+            # n-граммы дают кандидатов, точное совпадение подстроки проверяем по готовым строкам
+            matched = [
+                user_id for user_id in candidates
+                if first_name in self.lower_names[user_id][0]
+                and last_name in self.lower_names[user_id][1]
+            ]
+            matched.sort(key=self.order_by_id.__getitem__)
+            return [self.users_by_id[user_id] for user_id in matched]
+
+    def add_cart_item(self, user_id: int, item: dict) -> dict:
+        with self.lock:
+            cart = self.carts_by_user_id.get(user_id)
+            if cart is None:
+                cart = {"user_id": user_id, "items": []}
+                self.carts_by_user_id[user_id] = cart
+            cart["items"].append(item)
+            if self.journal is not None:
+                self.journal.log_add_cart_item(user_id, item)
+            return cart
+
+    def get_cart(self, user_id: int):
+        return self.carts_by_user_id.get(user_id)
+
+    def restore(self, users: list, carts: list, lower_names: dict, first_name_index: dict, last_name_index: dict):
+        # Загрузка состояния из снапшота в пустое хранилище: индексы приходят готовыми,
+        # пересчитывать n-граммы не нужно
+        with self.lock:
+            user_dicts = [dict(zip(USER_FIELDS, values)) for values in users]
+            self.users_by_id = {user["id"]: user for user in user_dicts}
+            # При совпадении логинов остаётся первый добавленный, как в add_user
+            self.users_by_username = {user["username"]: user for user in reversed(user_dicts)}
+            self.order_by_id = {user["id"]: position for position, user in enumerate(user_dicts)}
+            self.carts_by_user_id = {
+                user_id: {
+                    "user_id": user_id,
+                    "items": [{"product_id": product_id, "quantity": quantity} for product_id, quantity in items],
+                }
+                for user_id, items in carts
+            }
+            self.lower_names = lower_names
+            self.first_name_index = first_name_index
+            self.last_name_index = last_name_index
@@ -0,0 +1,105 @@
+import os
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+from store import InMemoryStore
+from persistence import StorePersistence
+
+# Один процесс-владелец держит InMemoryStore, воркеры uvicorn обращаются к нему
+# через unix-сокет: данные общие для всех процессов, записи идут под блокировкой хранилища
+STORE_SOCKET = os.getenv("STORE_SOCKET", "/tmp/lab2-store.sock")
+STORE_AUTHKEY = os.getenv("STORE_AUTHKEY", "lab2-store").encode()
+STORE_CONNECT_TIMEOUT = 30
+
+# Методы хранилища, доступные воркерам
+STORE_METHODS = {"add_user", "get_user_by_username", "search_users", "add_cart_item", "get_cart", "__len__"}
+
+def serve_connection(store: InMemoryStore, conn):
+    with conn:
+        while True:
+            try:
+                method, args = conn.recv()
+            except (EOFError, OSError):
+                return
+            if method not in STORE_METHODS:
+                conn.send(("error", f"Unknown store method {method}"))
+                continue
+            try:
+                result = getattr(store, method)(*args)
+            except Exception as e:
+                conn.send(("error", repr(e)))
+            else:
+                conn.send(("ok", result))
+
+def serve(store: InMemoryStore, address: str = STORE_SOCKET):
+    if os.path.exists(address):
+        os.remove(address)
+    with Listener(address, family="AF_UNIX", authkey=STORE_AUTHKEY) as listener:
+        print(f"Store server listening on {address}")
+        while True:
+            conn = listener.accept()
+            # Отдельный поток на соединение воркера; чтения (get_*) берут словарь без блокировки
+            threading.Thread(target=serve_connection, args=(store, conn), daemon=True).start()
+
+# Клиент на стороне воркера с тем же интерфейсом, что и InMemoryStore.
+# Обработчики FastAPI выполняются в пуле потоков, поэтому соединение своё у каждого потока
+class RemoteStore:
+    def __init__(self, address: str = STORE_SOCKET):
+        self.address = address
+        self.local = threading.local()
+
+    def connection(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            # Воркеры могут стартовать раньше владельца, ждём появления сокета
+            deadline = time.monotonic() + STORE_CONNECT_TIMEOUT
+            while True:
+                try:
+                    conn = Client(self.address, family="AF_UNIX", authkey=STORE_AUTHKEY)
+                    break
+                except (FileNotFoundError, ConnectionRefusedError):
+                    if time.monotonic() > deadline:
+                        raise
+                    time.sleep(0.1)
+            self.local.conn = conn
+        return conn
+
+    def call(self, method: str, *args):
+        conn = self.connection()
+        try:
+            conn.send((method, args))
+            status, result = conn.recv()
+        except (EOFError, OSError):
+            # Владелец перезапустился: следующий вызов переподключится
+            self.local.conn = None
+            raise
+        if status == "error":
+            raise RuntimeError(result)
+        return result
+
+    def __len__(self):
+        return self.call("__len__")
+
+    def add_user(self, user: dict) -> bool:
+        return self.call("add_user", user)
+
+    def get_user_by_username(self, username: str):
+        return self.call("get_user_by_username", username)
+
+    def search_users(self, first_name: str, last_name: str) -> list:
+        return self.call("search_users", first_name, last_name)
+
+    def add_cart_item(self, user_id: int, item: dict) -> dict:
+        return self.call("add_cart_item", user_id, item)
+
+    def get_cart(self, user_id: int):
+        return self.call("get_cart", user_id)
+
+if __name__ == "__main__":
+    store = InMemoryStore()
+    StorePersistence(
+        store,
+        os.getenv("STORE_DATA_DIR", "data"),
+        snapshot_interval=float(os.getenv("STORE_SNAPSHOT_INTERVAL", "300")),
+    ).start()
+    serve(store)
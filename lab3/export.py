@@ -0,0 +1,46 @@
+import argparse
+import os
+import sys
+import psycopg2
+
+# Выгрузка каталога и корзин напрямую через COPY ... TO STDOUT: Postgres сам
+# форматирует строки, клиент только перекладывает байты, память постоянна.
+# Для регулярных выгрузок лучше запускать на реплике
+SQLALCHEMY_DATABASE_URL = os.getenv("SQLALCHEMY_DATABASE_URL", "postgresql://postgres:archdb@db/ozon_db")
+
+EXPORT_QUERIES = {
+    "products": "SELECT id, name, price FROM products ORDER BY id",
+    "carts": (
+        "SELECT c.id AS cart_id, c.user_id, i.product_id, i.quantity "
+        "FROM carts c JOIN cart_items i ON i.cart_id = c.id"
+    ),
+}
+
+# NDJSON: строка формирует JSON сама, а CSV с непечатаемыми QUOTE/DELIMITER
+# выводит её как есть (текстовый формат COPY экранировал бы обратные слеши)
+COPY_FORMATS = {
+    "csv": "COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER)",
+    "ndjson": "COPY (SELECT row_to_json(t) FROM ({query}) t) TO STDOUT WITH (FORMAT csv, QUOTE e'\\x01', DELIMITER e'\\x02')",
+}
+
+def export(table: str, fmt: str, output):
+    conn = psycopg2.connect(SQLALCHEMY_DATABASE_URL)
+    try:
+        # Согласованный снимок только на чтение, как у /export/*
+        conn.set_session(isolation_level="REPEATABLE READ", readonly=True)
+        with conn.cursor() as cursor:
+            cursor.copy_expert(COPY_FORMATS[fmt].format(query=EXPORT_QUERIES[table]), output)
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export products or carts from Postgres")
+    parser.add_argument("table", choices=sorted(EXPORT_QUERIES))
+    parser.add_argument("--format", choices=sorted(COPY_FORMATS), default="ndjson")
+    parser.add_argument("--output", help="File to write, stdout by default")
+    args = parser.parse_args()
+    if args.output:
+        with open(args.output, "wb") as f:
+            export(args.table, args.format, f)
+    else:
+        export(args.table, args.format, sys.stdout.buffer)
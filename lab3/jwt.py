@@ -1,19 +1,37 @@
 from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Literal, Optional
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from sqlalchemy import create_engine, Column, Integer, String, Float, ForeignKey
+from sqlalchemy import create_engine, select, text, Column, Integer, String, Float, ForeignKey
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import sessionmaker, Session, relationship
 from sqlalchemy.ext.declarative import declarative_base
+import csv
+import io
+import json
 
 # Настройка SQLAlchemy
 SQLALCHEMY_DATABASE_URL = "postgresql://postgres:archdb@db/ozon_db"
 engine = create_engine(SQLALCHEMY_DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Отдельный маленький пул для выгрузок: долгие чтения не занимают соединения
+# основного пула, а одновременных выгрузок не больше EXPORT_MAX_CONCURRENT.
+# REPEATABLE READ даёт согласованный снимок на всё время выгрузки
+EXPORT_MAX_CONCURRENT = 2
+export_engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    pool_size=EXPORT_MAX_CONCURRENT,
+    max_overflow=0,
+    pool_timeout=1,
+    isolation_level="REPEATABLE READ",
+)
+ExportSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=export_engine)
+
 Base = declarative_base()
 
 # Модель пользователя
@@ -214,6 +232,70 @@ def get_cart(user_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Cart not found")
     return cart
 
+# Выгрузка: строки читаются серверным курсором пачками по EXPORT_BATCH_SIZE
+# и отдаются кусками около EXPORT_CHUNK_SIZE байт, память не зависит от объёма таблицы
+EXPORT_BATCH_SIZE = 10000
+EXPORT_CHUNK_SIZE = 64 * 1024
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+def export_rows(db: Session, query, columns: tuple, fmt: str):
+    try:
+        result = db.execute(query.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE))
+        buffer = io.StringIO()
+        writer = csv.writer(buffer) if fmt == "csv" else None
+        if writer is not None:
+            writer.writerow(columns)
+        for row in result:
+            if writer is not None:
+                writer.writerow(row)
+            else:
+                buffer.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False))
+                buffer.write("\n")
+            if buffer.tell() >= EXPORT_CHUNK_SIZE:
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode()
+    finally:
+        db.rollback()
+        db.close()
+
+def export_response(query, columns: tuple, fmt: str, name: str):
+    # Своя сессия, а не get_db: она живёт, пока ответ не дочитан. Соединение берётся
+    # до начала ответа, чтобы при занятом пуле вернуть 503, а не оборвать поток
+    db = ExportSessionLocal()
+    try:
+        db.execute(text("SET TRANSACTION READ ONLY"))
+    except PoolTimeoutError:
+        db.close()
+        raise HTTPException(status_code=503, detail="Too many exports in progress", headers={"Retry-After": "10"})
+    return StreamingResponse(
+        export_rows(db, query, columns, fmt),
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{fmt}"'},
+    )
+
+# Выгрузка каталога товаров
+@app.get("/export/products")
+def export_products(
+    format: Literal["ndjson", "csv"] = "ndjson", current_user: UserDB = Depends(get_current_client)
+):
+    query = select(ProductDB.id, ProductDB.name, ProductDB.price).order_by(ProductDB.id)
+    return export_response(query, ("id", "name", "price"), format, "products")
+
+# Выгрузка содержимого всех корзин: одна строка на позицию. Без ORDER BY:
+# сортировка десятков миллионов строк задержала бы первый байт и нагрузила базу
+@app.get("/export/carts")
+def export_carts(
+    format: Literal["ndjson", "csv"] = "ndjson", current_user: UserDB = Depends(get_current_client)
+):
+    query = (
+        select(CartDB.id, CartDB.user_id, CartItemDB.product_id, CartItemDB.quantity)
+        .join(CartItemDB, CartItemDB.cart_id == CartDB.id)
+    )
+    return export_response(query, ("cart_id", "user_id", "product_id", "quantity"), format, "carts")
+
 # Запуск сервера
 if __name__ == "__main__":
     import uvicorn
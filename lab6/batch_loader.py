@@ -0,0 +1,56 @@
+import threading
+import time
+from concurrent.futures import Future
+
+# Пакетная загрузка по ключам в духе DataLoader: запросы, пришедшие в течение окна
+# из любых потоков, объединяются в один вызов batch_fn, одинаковые ключи загружаются один раз.
+# batch_fn получает список ключей и возвращает словарь ключ -> значение (ненайденные ключи — None)
+class BatchLoader:
+    def __init__(self, batch_fn, window_ms: float = 2, max_batch: int = 500):
+        self.batch_fn = batch_fn
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.scheduled = False
+
+    def load(self, key):
+        return self.load_many([key])[0]
+
+    def load_many(self, keys: list) -> list:
+        if not keys:
+            return []  # Иначе поток стал бы ведущим и зря ждал окно
+        futures = []
+        leader = False
+        with self.lock:
+            for key in keys:
+                future = self.pending.get(key)
+                if future is None:
+                    future = Future()
+                    self.pending[key] = future
+                futures.append(future)
+            if not self.scheduled:
+                self.scheduled = True
+                leader = True
+        if leader:
+            # Первый поток в окне ждёт остальных и выполняет запрос за всех
+            time.sleep(self.window)
+            self.dispatch()
+        return [future.result() for future in futures]
+
+    def dispatch(self):
+        with self.lock:
+            batch = self.pending
+            self.pending = {}
+            self.scheduled = False
+        keys = list(batch)
+        for start in range(0, len(keys), self.max_batch):
+            chunk = keys[start:start + self.max_batch]
+            try:
+                results = self.batch_fn(chunk)
+            except Exception as e:
+                for key in chunk:
+                    batch[key].set_exception(e)
+                continue
+            for key in chunk:
+                batch[key].set_result(results.get(key))
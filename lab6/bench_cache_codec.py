@@ -0,0 +1,59 @@
+import sys
+import time
+import warnings
+from pydantic import BaseModel
+from cache_codec import CacheCodec, available_codecs
+
+# Копия модели User из jwt.py (импорт jwt.py сразу подключается к базам данных)
+class User(BaseModel):
+    id: int
+    username: str
+    first_name: str
+    last_name: str
+    hashed_password: str
+    email: str
+
+# В pydantic 2 construct() переименован в model_construct()
+construct_user = getattr(User, "model_construct", User.construct)
+
+USER_FIELDS = ("id", "username", "first_name", "last_name", "hashed_password", "email")
+
+def make_users(count):
+    return [
+        User(
+            id=i,
+            username=f"user{i}",
+            first_name="Ivan",
+            last_name=f"Ivanov{i % 1000}",
+            hashed_password="$2b$12$EixZaYVK1fsbw1ZfbX3OXePaWxn96p36WQoeG6Lruj3vjPGga31lW",
+            email=f"user{i}@ozon.com",
+        )
+        for i in range(count)
+    ]
+
+def report(name, entries, decode):
+    started = time.perf_counter()
+    for entry in entries:
+        decode(entry)
+    elapsed = time.perf_counter() - started
+    avg_bytes = sum(len(entry) for entry in entries) / len(entries)
+    print(f"{name:<16} {avg_bytes:>10.1f} {elapsed / len(entries) * 1e6:>14.2f}")
+
+def main():
+    warnings.simplefilter("ignore", DeprecationWarning)
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    users = make_users(count)
+    print(f"{count} users")
+    print(f"{'codec':<16} {'bytes/entry':>10} {'decode, us':>14}")
+
+    # Текущий формат: user.json() + User.parse_raw с полной валидацией
+    legacy = [user.json().encode() for user in users]
+    report("json+parse_raw", legacy, User.parse_raw)
+
+    for name in available_codecs():
+        codec = CacheCodec(name, 1, USER_FIELDS)
+        entries = [codec.encode(user) for user in users]
+        report(name, entries, lambda raw: construct_user(**codec.decode(raw)))
+
+if __name__ == "__main__":
+    main()
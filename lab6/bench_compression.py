@@ -0,0 +1,66 @@
+import sys
+import time
+import orjson
+from response_compression import ENCODERS, available_encodings, compress
+
+# Уровни, которые имеет смысл сравнивать для каждой кодировки
+LEVELS = {"gzip": (1, 4, 6, 9), "br": (1, 4, 5, 7, 11), "zstd": (1, 3, 6, 9, 15)}
+STREAM_CHUNK = 64 * 1024  # Размер куска потокового ответа
+
+# Тела ответов в том виде, в каком их отдаёт jwt.py (orjson, см. respond())
+def make_payloads(user_count, item_count):
+    users = [
+        {
+            "id": i,
+            "username": f"user{i}",
+            "first_name": "Ivan",
+            "last_name": f"Ivanov{i % 1000}",
+            "hashed_password": "$2b$12$EixZaYVK1fsbw1ZfbX3OXePaWxn96p36WQoeG6Lruj3vjPGga31lW",
+            "email": f"user{i}@ozon.com",
+        }
+        for i in range(user_count)
+    ]
+    cart = {"user_id": 1, "items": [{"product_id": i, "quantity": 1 + i % 5} for i in range(item_count)]}
+    products = [{"id": i, "name": f"Product {i} wireless headphones", "price": 99.9 + i % 500} for i in range(item_count)]
+    return {
+        "users": orjson.dumps(users),
+        "cart": orjson.dumps(cart),
+        "products": orjson.dumps(products),
+    }
+
+def compress_streamed(encoding, level, data):
+    # Так же, как CompressionMiddleware сжимает потоковый ответ: flush после каждого куска
+    encoder = ENCODERS[encoding](level)
+    total = 0
+    for start in range(0, len(data), STREAM_CHUNK):
+        total += len(encoder.compress(data[start:start + STREAM_CHUNK]) + encoder.flush())
+    return total + len(encoder.finish())
+
+def measure(encoding, level, data, repeat):
+    started = time.process_time()
+    for _ in range(repeat):
+        size = len(compress(encoding, level, data))
+    elapsed = (time.process_time() - started) / repeat
+    return size, elapsed * 1000
+
+def main():
+    user_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    item_count = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    repeat = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+    payloads = make_payloads(user_count, item_count)
+    print(f"search: {user_count} users, cart/products: {item_count} items, {repeat} runs each, CPU time")
+    print(f"{'payload':<10} {'codec':<8} {'bytes':>10} {'ratio':>7} {'cpu ms':>9} {'MB/s':>8} {'streamed':>10}")
+    for name, data in payloads.items():
+        print(f"{name:<10} {'none':<8} {len(data):>10}")
+        for encoding in available_encodings():
+            for level in LEVELS[encoding]:
+                size, ms = measure(encoding, level, data, repeat)
+                streamed = compress_streamed(encoding, level, data)
+                codec = f"{encoding}-{level}"
+                print(
+                    f"{name:<10} {codec:<8} {size:>10} {len(data) / size:>7.1f} "
+                    f"{ms:>9.2f} {len(data) / 1e3 / ms:>8.1f} {streamed:>10}"
+                )
+
+if __name__ == "__main__":
+    main()
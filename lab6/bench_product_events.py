@@ -0,0 +1,68 @@
+import sys
+import time
+import warnings
+import zlib
+from pydantic import BaseModel
+from product_events import encode_product_event, decode_product_event
+
+# Библиотеки сжатия, которые использует librdkafka, подключаются при наличии
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Копия модели Product из jwt.py (импорт jwt.py сразу подключается к базам данных)
+class Product(BaseModel):
+    id: int
+    name: str
+    price: float
+
+BATCH_SIZE = 1000  # Примерный размер пачки, которую продюсер сжимает целиком
+
+def compressors():
+    yield "none", lambda data: data
+    yield "gzip", lambda data: zlib.compress(data, 6)
+    if lz4 is not None:
+        yield "lz4", lz4.frame.compress
+    if zstandard is not None:
+        yield "zstd", zstandard.ZstdCompressor(level=3).compress
+
+def compressed_bytes_per_event(values, compress):
+    total = 0
+    for start in range(0, len(values), BATCH_SIZE):
+        total += len(compress(b"".join(values[start:start + BATCH_SIZE])))
+    return total / len(values)
+
+def main():
+    warnings.simplefilter("ignore", DeprecationWarning)
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    products = [Product(id=i, name=f"Product {i % 5000} model {i}", price=round(i * 0.37, 2)) for i in range(count)]
+    print(f"{count} events, compression batches of {BATCH_SIZE}")
+    print(f"{'format':<10} {'compression':<12} {'bytes/event':>12}")
+    encoded = {}
+    for event_format in ("json", "msgpack"):
+        messages = [encode_product_event(product, event_format) for product in products]
+        encoded[event_format] = messages
+        values = [value for value, _ in messages]
+        for name, compress in compressors():
+            print(f"{event_format:<10} {name:<12} {compressed_bytes_per_event(values, compress):>12.1f}")
+
+    print(f"{'decoder':<24} {'events/s':>12}")
+    # Прежний путь консьюмера: Product.parse_raw
+    started = time.perf_counter()
+    for value, _ in encoded["json"]:
+        Product.parse_raw(value)
+    print(f"{'json+parse_raw':<24} {count / (time.perf_counter() - started):>12.0f}")
+    for event_format in ("json", "msgpack"):
+        started = time.perf_counter()
+        for value, headers in encoded[event_format]:
+            Product(**decode_product_event(value, headers))
+        print(f"{event_format + '+validate':<24} {count / (time.perf_counter() - started):>12.0f}")
+
+if __name__ == "__main__":
+    main()
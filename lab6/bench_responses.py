@@ -0,0 +1,97 @@
+import sys
+import time
+from types import SimpleNamespace
+from typing import List
+import orjson
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient  # требуется httpx
+from pydantic import BaseModel
+
+# Копии моделей из jwt.py (импорт jwt.py сразу подключается к базам данных)
+class User(BaseModel):
+    id: int
+    username: str
+    first_name: str
+    last_name: str
+    hashed_password: str
+    email: str
+    class Config:
+        from_attributes = True
+
+class CartItem(BaseModel):
+    product_id: int
+    quantity: int
+    class Config:
+        from_attributes = True
+
+class Cart(BaseModel):
+    user_id: int
+    items: List[CartItem]
+    class Config:
+        from_attributes = True
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return orjson.dumps(content)
+
+USER_FIELDS = ("id", "username", "first_name", "last_name", "hashed_password", "email")
+
+def make_app(user_count, item_count):
+    # ORM-строки имитируем объектами с атрибутами
+    rows = [
+        SimpleNamespace(
+            id=i,
+            username=f"user{i}",
+            first_name="Ivan",
+            last_name=f"Ivanov{i % 1000}",
+            hashed_password="$2b$12$EixZaYVK1fsbw1ZfbX3OXePaWxn96p36WQoeG6Lruj3vjPGga31lW",
+            email=f"user{i}@ozon.com",
+        )
+        for i in range(user_count)
+    ]
+    items = [SimpleNamespace(product_id=i, quantity=1 + i % 5) for i in range(item_count)]
+    app = FastAPI()
+
+    @app.get("/legacy/users", response_model=List[User])
+    def legacy_users():
+        return rows
+
+    @app.get("/fast/users", response_model=List[User])
+    def fast_users():
+        return FastJSONResponse([{field: getattr(row, field) for field in USER_FIELDS} for row in rows])
+
+    @app.get("/legacy/cart", response_model=Cart)
+    def legacy_cart():
+        return Cart(user_id=1, items=[CartItem(product_id=i.product_id, quantity=i.quantity) for i in items])
+
+    @app.get("/fast/cart", response_model=Cart)
+    def fast_cart():
+        return FastJSONResponse({
+            "user_id": 1,
+            "items": [{"product_id": i.product_id, "quantity": i.quantity} for i in items],
+        })
+
+    return app
+
+def measure(client, path, repeat):
+    client.get(path)  # прогрев
+    started = time.perf_counter()
+    for _ in range(repeat):
+        response = client.get(path)
+    elapsed = (time.perf_counter() - started) / repeat
+    return elapsed * 1000, len(response.content)
+
+def main():
+    user_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    item_count = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    repeat = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+    client = TestClient(make_app(user_count, item_count))
+    print(f"search: {user_count} users, cart: {item_count} items, {repeat} requests each")
+    print(f"{'route':<16} {'ms/request':>12} {'bytes':>10}")
+    for path in ("/legacy/users", "/fast/users", "/legacy/cart", "/fast/cart"):
+        ms, size = measure(client, path, repeat)
+        print(f"{path:<16} {ms:>12.2f} {size:>10}")
+
+if __name__ == "__main__":
+    main()
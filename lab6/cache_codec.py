@@ -0,0 +1,73 @@
+import json
+from typing import Optional, Sequence
+
+# Быстрые кодеки подключаются, только если установлены
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Идентификаторы кодеков хранятся во втором байте записи
+CODEC_IDS = {"json": 1, "orjson": 2, "msgpack": 3}
+
+def _dumps(codec: str, values: list) -> bytes:
+    if codec == "msgpack":
+        return msgpack.packb(values, use_bin_type=True)
+    if codec == "orjson":
+        return orjson.dumps(values)
+    return json.dumps(values, ensure_ascii=False, separators=(",", ":")).encode()
+
+def _loads(codec_id: int, payload: bytes):
+    if codec_id == CODEC_IDS["msgpack"] and msgpack is not None:
+        return msgpack.unpackb(payload, raw=False)
+    if codec_id == CODEC_IDS["orjson"] and orjson is not None:
+        return orjson.loads(payload)
+    if codec_id in (CODEC_IDS["json"], CODEC_IDS["orjson"]):
+        return json.loads(payload)
+    return None
+
+def available_codecs() -> list:
+    codecs = ["json"]
+    if orjson is not None:
+        codecs.append("orjson")
+    if msgpack is not None:
+        codecs.append("msgpack")
+    return codecs
+
+# Компактная запись сущности: [версия схемы][кодек][значения полей в фиксированном порядке]
+class CacheCodec:
+    def __init__(self, codec: str, schema_version: int, fields: Sequence[str]):
+        if codec not in CODEC_IDS:
+            raise ValueError(f"Unknown cache codec: {codec}")
+        if codec not in available_codecs():
+            print(f"Cache codec {codec} is not installed, falling back to json")
+            codec = "json"
+        self.codec = codec
+        self.schema_version = schema_version
+        self.fields = tuple(fields)
+        self.header = bytes([schema_version, CODEC_IDS[codec]])
+
+    def encode(self, obj) -> bytes:
+        # Принимаем как словарь, так и объект с атрибутами (pydantic или ORM)
+        if isinstance(obj, dict):
+            values = [obj[field] for field in self.fields]
+        else:
+            values = [getattr(obj, field) for field in self.fields]
+        return self.header + _dumps(self.codec, values)
+
+    def decode(self, raw: bytes) -> Optional[dict]:
+        # Записи другой версии схемы (или старый JSON) считаем промахом
+        if not raw or len(raw) < 2 or raw[0] != self.schema_version:
+            return None
+        try:
+            values = _loads(raw[1], raw[2:])
+        except ValueError:
+            return None
+        if not isinstance(values, list) or len(values) != len(self.fields):
+            return None
+        return dict(zip(self.fields, values))
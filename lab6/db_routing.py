@@ -0,0 +1,64 @@
+import itertools
+import threading
+import time
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Реплики PostgreSQL с проверкой живости: фоновый поток раз в check_interval секунд
+# выполняет SELECT 1 на каждой, выбор идёт по кругу среди живых. Если живых нет,
+# чтения уходят на основную базу
+class ReplicaPool:
+    def __init__(self, engines: list, check_interval: float = 2):
+        self.engines = engines
+        self.check_interval = check_interval
+        self.healthy = list(engines)
+        self.counter = itertools.count()
+
+    def choose(self):
+        healthy = self.healthy
+        if not healthy:
+            return None
+        return healthy[next(self.counter) % len(healthy)]
+
+    def check(self):
+        healthy = []
+        for engine in self.engines:
+            try:
+                with engine.connect() as conn:
+                    conn.execute(text("SELECT 1"))
+                healthy.append(engine)
+            except Exception as e:
+                if engine in self.healthy:
+                    print(f"Replica {engine.url.host} is down: {e}")
+        self.healthy = healthy
+
+    def health_loop(self):
+        while True:
+            time.sleep(self.check_interval)
+            self.check()
+
+    def start(self):
+        if self.engines:
+            threading.Thread(target=self.health_loop, daemon=True).start()
+
+# Сессия, которая читает с реплики, а пишет в основную базу. Реплика выбирается один раз
+# на сессию (запрос видит одно состояние). После первой записи (flush) или вызова
+# use_primary() сессия до конца работает только с основной базой: чтение после записи
+# в том же запросе видит записанное
+class RoutingSession(Session):
+    def __init__(self, primary=None, replicas: ReplicaPool = None, **kwargs):
+        super().__init__(**kwargs)
+        self.primary = primary
+        self.replicas = replicas
+        self.replica = None
+
+    def use_primary(self):
+        self.info["use_primary"] = True
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._flushing or self.info.get("use_primary") or self.replicas is None:
+            self.info["use_primary"] = True
+            return self.primary
+        if self.replica is None:
+            self.replica = self.replicas.choose() or self.primary
+        return self.replica
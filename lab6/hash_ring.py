@@ -0,0 +1,18 @@
+import bisect
+import hashlib
+
+def ring_hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], "big")
+
+# Консистентное хеширование: каждый узел занимает vnodes точек на кольце, ключ
+# принадлежит первой точке по часовой стрелке. При добавлении узла переезжает
+# примерно 1/N ключей, и только на новый узел
+class HashRing:
+    def __init__(self, nodes: list, vnodes: int = 128):
+        points = sorted((ring_hash(f"{node}#{i}"), node) for node in nodes for i in range(vnodes))
+        self.hashes = [point for point, _ in points]
+        self.nodes = [node for _, node in points]
+
+    def node_for(self, key) -> str:
+        index = bisect.bisect(self.hashes, ring_hash(str(key)))
+        return self.nodes[index % len(self.nodes)]
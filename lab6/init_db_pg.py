@@ -1,6 +1,6 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text, Column, ForeignKey, MetaData, Table
 from sqlalchemy.orm import sessionmaker
-from jwt import Base, UserDB, CartDB, CartItemDB
+from jwt import Base, UserDB, CartDB, CartItemDB, CART_SHARD_DATABASE_URLS, cart_engines, cart_ring, cart_sessions
 from passlib.context import CryptContext
 
 # Настройка PostgreSQL
@@ -14,6 +14,34 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 # Создание таблиц
 Base.metadata.create_all(bind=engine)
 
+# Колонка версии для баз, созданных до её появления (create_all не меняет существующие таблицы)
+with engine.begin() as conn:
+    conn.execute(text("ALTER TABLE users ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1"))
+
+# Таблицы корзин на шардах: пользователей там нет, поэтому внешний ключ на users не переносим,
+# связь cart_items -> carts остаётся внутри шарда
+def cart_shard_metadata() -> MetaData:
+    metadata = MetaData()
+    shard_tables = {CartDB.__tablename__, CartItemDB.__tablename__}
+    for table in (CartDB.__table__, CartItemDB.__table__):
+        Table(table.name, metadata, *[
+            Column(
+                column.name,
+                column.type,
+                *[ForeignKey(fk.target_fullname) for fk in column.foreign_keys
+                  if fk.target_fullname.split(".")[0] in shard_tables],
+                primary_key=column.primary_key,
+                index=column.index,
+            )
+            for column in table.columns
+        ])
+    return metadata
+
+if CART_SHARD_DATABASE_URLS:
+    shard_metadata = cart_shard_metadata()
+    for shard_engine in cart_engines.values():
+        shard_metadata.create_all(bind=shard_engine)
+
 def load_test_data():
     db = SessionLocal()
 
@@ -58,15 +86,16 @@ def load_test_data():
         email="kirill.kotov@ozon.com",
     )
 
-    # Проверка существования корзины перед добавлением
+    # Проверка существования корзины перед добавлением (корзина лежит на шарде пользователя)
     def add_cart(user_id):
-        cart = db.query(CartDB).filter(CartDB.user_id == user_id).first()
+        cart_db = cart_sessions[cart_ring.node_for(user_id)]()
+        cart = cart_db.query(CartDB).filter(CartDB.user_id == user_id).first()
         if not cart:
             cart = CartDB(user_id=user_id)
-            db.add(cart)
-            db.commit()  # Сохраняем корзину сразу
-            return cart
-        return cart
+            cart_db.add(cart)
+            cart_db.commit()  # Сохраняем корзину сразу
+        cart_db.refresh(cart)
+        return cart_db, cart
 
     # Создание корзин
     admin_cart = add_cart(admin.id)  # Корзина для admin
@@ -74,26 +103,27 @@ def load_test_data():
     user2_cart = add_cart(user2.id)  # Корзина для user2
 
     # Проверка существования элемента корзины перед добавлением
-    def add_cart_item(cart_id, product_id, quantity):
-        cart_item = db.query(CartItemDB).filter(
-            CartItemDB.cart_id == cart_id,
+    def add_cart_item(shard_cart, product_id, quantity):
+        cart_db, cart = shard_cart
+        cart_item = cart_db.query(CartItemDB).filter(
+            CartItemDB.cart_id == cart.id,
             CartItemDB.product_id == product_id
         ).first()
         if not cart_item:
             cart_item = CartItemDB(
-                cart_id=cart_id,
+                cart_id=cart.id,
                 product_id=product_id,
                 quantity=quantity,
             )
-            db.add(cart_item)
-            db.commit()  # Сохраняем элемент корзины сразу
-            return cart_item
+            cart_db.add(cart_item)
+            cart_db.commit()  # Сохраняем элемент корзины сразу
+        cart_db.close()
         return cart_item
 
     # Создание элементов корзины
-    add_cart_item(admin_cart.id, 1, 1)  # Laptop in admin's cart (product_id=1)
-    add_cart_item(user1_cart.id, 2, 2)  # Smartphone in user1's cart (product_id=2)
-    add_cart_item(user2_cart.id, 3, 1)  # Headphones in user2's cart (product_id=3)
+    add_cart_item(admin_cart, 1, 1)  # Laptop in admin's cart (product_id=1)
+    add_cart_item(user1_cart, 2, 2)  # Smartphone in user1's cart (product_id=2)
+    add_cart_item(user2_cart, 3, 1)  # Headphones in user2's cart (product_id=3)
 
     db.close()
 
@@ -0,0 +1,97 @@
+import json
+import os
+import threading
+import time
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+from jose.exceptions import JWTError
+
+KEY_SUFFIX = ".pem"
+# Как часто перечитывать каталог ключей (ротация без перезапуска)
+KEYS_RELOAD_INTERVAL = 60
+
+def generate_key(keys_dir: str) -> str:
+    # Ключ для разработки, если каталог пуст; в проде ключи кладутся в каталог заранее
+    kid = time.strftime("%Y%m%d%H%M%S", time.gmtime())
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = private_key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    path = os.path.join(keys_dir, kid + KEY_SUFFIX)
+    # Закрытый ключ доступен только владельцу процесса, независимо от umask
+    fd = os.open(path + ".tmp", os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    os.fchmod(fd, 0o600)  # Если .tmp остался от прерванного запуска с другими правами
+    with os.fdopen(fd, "wb") as f:
+        f.write(pem)
+    os.replace(path + ".tmp", path)
+    return kid
+
+# Набор ключей подписи из каталога: <kid>.pem с закрытым ключом RSA. Подписывает самым
+# новым ключом, который опубликован в JWKS дольше activation_delay секунд (чтобы проверяющие
+# сервисы успели его получить), и проверяет любым ключом из каталога, пока тот не удалён.
+# Ключи разбираются один раз и хранятся готовыми объектами
+class KeyRing:
+    def __init__(self, keys_dir: str, algorithm: str = "RS256", activation_delay: float = 300):
+        self.keys_dir = keys_dir
+        self.algorithm = algorithm
+        self.activation_delay = activation_delay
+        self.lock = threading.Lock()
+        self.listing = None
+        self.checked_at = 0
+        self.private_keys = {}
+        self.public_keys = {}
+        self.published_at = {}
+        self.jwks = b'{"keys":[]}'
+
+    def refresh(self):
+        now = time.monotonic()
+        if now - self.checked_at < KEYS_RELOAD_INTERVAL and self.listing is not None:
+            return
+        with self.lock:
+            if now - self.checked_at < KEYS_RELOAD_INTERVAL and self.listing is not None:
+                return
+            self.checked_at = now
+            os.makedirs(self.keys_dir, mode=0o700, exist_ok=True)
+            files = sorted(name for name in os.listdir(self.keys_dir) if name.endswith(KEY_SUFFIX))
+            if not files:
+                files = [generate_key(self.keys_dir) + KEY_SUFFIX]
+            listing = {name: os.stat(os.path.join(self.keys_dir, name)).st_mtime for name in files}
+            if listing == self.listing:
+                return
+            private_keys, public_keys = {}, {}
+            for name in files:
+                kid = name[:-len(KEY_SUFFIX)]
+                with open(os.path.join(self.keys_dir, name), "rb") as f:
+                    private_keys[kid] = jwk.construct(f.read(), self.algorithm)
+                public_keys[kid] = private_keys[kid].public_key()
+            self.private_keys, self.public_keys = private_keys, public_keys
+            self.published_at = {name[:-len(KEY_SUFFIX)]: mtime for name, mtime in listing.items()}
+            self.jwks = json.dumps({"keys": [
+                dict(key.to_dict(), kid=kid, use="sig") for kid, key in public_keys.items()
+            ]}).encode()
+            self.listing = listing
+
+    def active_kid(self) -> str:
+        # kid упорядочены по времени создания. Пока ни один ключ не опубликован достаточно
+        # давно (первый запуск), берём самый старый: он дольше всех виден в JWKS
+        kids = sorted(self.private_keys)
+        published = [kid for kid in kids if time.time() - self.published_at[kid] >= self.activation_delay]
+        return published[-1] if published else kids[0]
+
+    def sign(self, claims: dict) -> str:
+        self.refresh()
+        kid = self.active_kid()
+        return jwt.encode(claims, self.private_keys[kid], algorithm=self.algorithm, headers={"kid": kid})
+
+    def decode(self, token: str) -> dict:
+        self.refresh()
+        kid = jwt.get_unverified_header(token).get("kid")
+        key = self.public_keys.get(kid)
+        if key is None:
+            raise JWTError(f"Unknown key id {kid}")
+        return jwt.decode(token, key, algorithms=[self.algorithm])
+
+    def jwks_json(self) -> bytes:
+        self.refresh()
+        return self.jwks
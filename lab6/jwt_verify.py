@@ -0,0 +1,58 @@
+import json
+import threading
+import time
+import urllib.request
+from jose import jwk, jwt
+from jose.exceptions import JWTError
+
+# Проверка токенов в других сервисах без обращения к сервису пользователей на каждый
+# запрос: открытые ключи берутся из /.well-known/jwks.json и хранятся разобранными по kid.
+# Неизвестный kid (ротация) вызывает внеплановое обновление, но не чаще min_refresh_interval
+#
+#   verifier = JWKSVerifier("http://app:8000/.well-known/jwks.json")
+#   claims = verifier.decode(token)
+class JWKSVerifier:
+    def __init__(self, jwks_url: str, algorithms: tuple = ("RS256",), ttl: float = 300,
+                 min_refresh_interval: float = 30, timeout: float = 2):
+        self.jwks_url = jwks_url
+        self.algorithms = list(algorithms)
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.keys = {}
+        self.fetched_at = 0
+        self.attempted_at = float("-inf")
+
+    def fetch(self):
+        with urllib.request.urlopen(self.jwks_url, timeout=self.timeout) as response:
+            jwks = json.load(response)
+        keys = {}
+        for key in jwks.get("keys", []):
+            if key.get("use", "sig") == "sig" and key.get("alg") in self.algorithms:
+                keys[key["kid"]] = jwk.construct(key)
+        self.keys = keys
+        self.fetched_at = time.monotonic()
+
+    def key_for(self, kid: str):
+        key = self.keys.get(kid)
+        if key is not None and time.monotonic() - self.fetched_at < self.ttl:
+            return key
+        with self.lock:
+            # Неизвестный kid (или чужой токен) не должен каждый раз ходить в сеть
+            if time.monotonic() - self.attempted_at >= self.min_refresh_interval:
+                self.attempted_at = time.monotonic()
+                try:
+                    self.fetch()
+                except OSError:
+                    # Сервис ключей недоступен: продолжаем проверять уже известными ключами
+                    if not self.keys:
+                        raise
+        return self.keys.get(kid)
+
+    def decode(self, token: str, **options) -> dict:
+        kid = jwt.get_unverified_header(token).get("kid")
+        key = self.key_for(kid)
+        if key is None:
+            raise JWTError(f"Unknown key id {kid}")
+        return jwt.decode(token, key, algorithms=self.algorithms, **options)
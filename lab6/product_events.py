@@ -0,0 +1,41 @@
+import json
+from typing import Optional
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Сообщения product_created: без заголовка schema-id — старый JSON (product.json()),
+# со схемой 1 — msgpack-массив значений полей в фиксированном порядке
+SCHEMA_HEADER = "schema-id"
+PRODUCT_CREATED_V1 = 1
+PRODUCT_EVENT_FIELDS = ("id", "name", "price")
+
+def encode_product_event(product, event_format: str = "msgpack"):
+    if event_format == "msgpack" and msgpack is not None:
+        values = [getattr(product, field) for field in PRODUCT_EVENT_FIELDS]
+        headers = [(SCHEMA_HEADER, str(PRODUCT_CREATED_V1).encode())]
+        return msgpack.packb(values, use_bin_type=True), headers
+    return product.json().encode(), []
+
+def get_schema_id(headers) -> Optional[int]:
+    for key, value in headers or []:
+        if key == SCHEMA_HEADER:
+            return int(value)
+    return None
+
+# Любое повреждённое сообщение даёт ValueError: консьюмер пропускает его и читает дальше
+def decode_product_event(value: bytes, headers=None) -> dict:
+    schema_id = get_schema_id(headers)
+    if schema_id is None:
+        fields = json.loads(value)
+        if not isinstance(fields, dict):
+            raise ValueError("product_created JSON payload is not an object")
+        return fields
+    if schema_id == PRODUCT_CREATED_V1:
+        values = msgpack.unpackb(value, raw=False)
+        if not isinstance(values, list) or len(values) != len(PRODUCT_EVENT_FIELDS):
+            raise ValueError("product_created msgpack payload is not a field array")
+        return dict(zip(PRODUCT_EVENT_FIELDS, values))
+    raise ValueError(f"Unknown product_created schema id: {schema_id}")
@@ -0,0 +1,101 @@
+import bisect
+import heapq
+import math
+import re
+import threading
+
+TOKEN_RE = re.compile(r"\w+")
+
+# Токен с длинным списком товаров, встречающийся в большой доле каталога, считается
+# стоп-словом, если в запросе есть более редкие токены: так время запроса не растёт с каталогом
+COMMON_TOKEN_RATIO = 0.2
+COMMON_TOKEN_MIN_IDS = 10000
+# Больше стольких id за один запрос не оцениваем: более частые токены запроса отбрасываются
+MAX_SCORED_IDS = 50000
+
+def tokenize(text: str) -> list:
+    return TOKEN_RE.findall(text.lower())
+
+# Инвертированный индекс по названиям товаров: токен -> {число токенов в названии -> id по возрастанию}.
+# Внутри одного токена порядок по релевантности совпадает с порядком по длине названия и id,
+# поэтому запрос из одного (или одного оставшегося после отсева частых) токена читает
+# только первые offset + limit id, сколько бы товаров ни содержали этот токен
+class ProductSearchIndex:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.postings = {}
+        self.counts = {}
+        self.tokens_by_id = {}
+        self.ready = False
+
+    def __len__(self):
+        return len(self.tokens_by_id)
+
+    def add(self, product_id: int, name: str):
+        tokens = tuple(set(tokenize(name)))
+        with self.lock:
+            old_tokens = self.tokens_by_id.get(product_id, ())
+            for token in old_tokens:
+                buckets = self.postings.get(token)
+                ids = buckets.get(len(old_tokens)) if buckets is not None else None
+                if ids is None:
+                    continue
+                i = bisect.bisect_left(ids, product_id)
+                if i < len(ids) and ids[i] == product_id:
+                    del ids[i]
+                    self.counts[token] -= 1
+                    if not ids:
+                        del buckets[len(old_tokens)]
+                    if not buckets:
+                        del self.postings[token]
+                        del self.counts[token]
+            self.tokens_by_id[product_id] = tokens
+            for token in tokens:
+                # Новые товары обычно получают самый большой id, и вставка сводится к append
+                bisect.insort(self.postings.setdefault(token, {}).setdefault(len(tokens), []), product_id)
+                self.counts[token] = self.counts.get(token, 0) + 1
+
+    def search(self, query: str, offset: int, limit: int) -> list:
+        # Ранжирование: сумма idf совпавших токенов, нормированная на длину названия
+        need = offset + limit
+        with self.lock:
+            total = len(self.tokens_by_id)
+            matched = sorted(
+                ((self.counts[token], token) for token in set(tokenize(query)) if token in self.postings)
+            )
+            if len(matched) > 1:
+                max_ids = max(COMMON_TOKEN_RATIO * total, COMMON_TOKEN_MIN_IDS)
+                rare = [item for item in matched if item[0] <= max_ids]
+                matched = rare or matched[:1]
+            selected, scored = [], 0
+            for count, token in matched:
+                if selected and scored + count > MAX_SCORED_IDS:
+                    break
+                selected.append((count, token))
+                scored += count
+            if len(selected) == 1:
+                count, token = selected[0]
+                idf = math.log(1 + total / count)
+                top = []
+                for length in sorted(self.postings[token]):
+                    ids = self.postings[token][length]
+                    top.extend((product_id, idf / math.sqrt(length)) for product_id in ids[:need - len(top)])
+                    if len(top) >= need:
+                        break
+                return top[offset:]
+            # Оценка нескольких токенов идёт по копии списков (не больше MAX_SCORED_IDS id),
+            # чтобы не держать блокировку и не задерживать add() из консьюмера
+            snapshot = [
+                (math.log(1 + total / count), [(length, ids[:]) for length, ids in self.postings[token].items()])
+                for count, token in selected
+            ]
+        scores = {}
+        lengths = {}
+        for idf, buckets in snapshot:
+            for length, ids in buckets:
+                for product_id in ids:
+                    scores[product_id] = scores.get(product_id, 0.0) + idf
+                    lengths[product_id] = length
+        ranked = [(score / math.sqrt(lengths[product_id]), product_id) for product_id, score in scores.items()]
+        top = heapq.nlargest(need, ranked, key=lambda item: (item[0], -item[1]))
+        return [(product_id, score) for score, product_id in top[offset:]]
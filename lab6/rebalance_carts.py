@@ -0,0 +1,79 @@
+import argparse
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from jwt import CartDB, CartItemDB, cart_ring, cart_sessions, shard_name
+
+# Перенос корзин после изменения CART_SHARD_DATABASE_URLS. Скрипт запускается с новым
+# списком шардов: каждая корзина, которая по новому кольцу принадлежит другому шарду,
+# копируется туда (позиции добавляются к уже существующей корзине) и удаляется со старого.
+# Шард, выводимый из кольца, передаётся через --drain, с него переносится всё.
+# На время переноса запись в корзины нужно остановить: корзина, которую уже перенесли,
+# до перезапуска сервиса с новым списком шардов ему не видна
+MOVE_BATCH = 500
+
+def misplaced_carts(name: str, session_factory) -> list:
+    db = session_factory()
+    try:
+        rows = db.query(CartDB.user_id).execution_options(yield_per=10000)
+        return [user_id for (user_id,) in rows if cart_ring.node_for(user_id) != name]
+    finally:
+        db.close()
+
+def move_carts(source_factory, user_ids: list):
+    source = source_factory()
+    targets = {}
+    try:
+        carts = source.query(CartDB).filter(CartDB.user_id.in_(user_ids)).with_for_update().all()
+        for cart in carts:
+            name = cart_ring.node_for(cart.user_id)
+            target = targets.get(name)
+            if target is None:
+                target = targets[name] = cart_sessions[name]()
+            target_cart = target.query(CartDB).filter(CartDB.user_id == cart.user_id).first()
+            if target_cart is None:
+                target_cart = CartDB(user_id=cart.user_id)
+                target.add(target_cart)
+                target.flush()
+            target.add_all([
+                CartItemDB(cart_id=target_cart.id, product_id=item.product_id, quantity=item.quantity)
+                for item in cart.items
+            ])
+        # Сначала фиксируем копии: сбой между коммитами даст повтор позиций, но не потерю
+        for target in targets.values():
+            target.commit()
+        cart_ids = [cart.id for cart in carts]
+        source.query(CartItemDB).filter(CartItemDB.cart_id.in_(cart_ids)).delete(synchronize_session=False)
+        source.query(CartDB).filter(CartDB.id.in_(cart_ids)).delete(synchronize_session=False)
+        source.commit()
+        return len(carts)
+    except Exception:
+        for target in targets.values():
+            target.rollback()
+        source.rollback()
+        raise
+    finally:
+        for target in targets.values():
+            target.close()
+        source.close()
+
+def rebalance(drain_urls: list, dry_run: bool):
+    sources = dict(cart_sessions)
+    for url in drain_urls:
+        drain_engine = create_engine(url)
+        sources[shard_name(drain_engine.url)] = sessionmaker(bind=drain_engine)
+    for name, session_factory in sources.items():
+        user_ids = misplaced_carts(name, session_factory)
+        print(f"{name}: {len(user_ids)} carts to move")
+        if dry_run:
+            continue
+        moved = 0
+        for i in range(0, len(user_ids), MOVE_BATCH):
+            moved += move_carts(session_factory, user_ids[i:i + MOVE_BATCH])
+        print(f"{name}: moved {moved} carts")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move carts to the shards of the current hash ring")
+    parser.add_argument("--drain", action="append", default=[], help="DSN of a shard removed from the ring")
+    parser.add_argument("--dry-run", action="store_true", help="Only count carts to move")
+    args = parser.parse_args()
+    rebalance(args.drain, args.dry_run)
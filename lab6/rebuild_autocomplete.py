@@ -0,0 +1,45 @@
+import uuid
+from sqlalchemy import func
+from jwt import SessionLocal, UserDB, USERNAMES_KEY, redis_client
+
+# Полная пересборка множества логинов для /users/autocomplete из PostgreSQL.
+# Логины пишутся во временный ключ пачками, затем RENAME атомарно подменяет рабочий ключ:
+# автодополнение всё время отвечает по целому множеству
+REBUILD_BATCH = 10000
+
+def add_usernames(key: str, usernames: list):
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.zadd(key, {username: 0 for username in usernames})
+    pipe.execute()
+
+def rebuild():
+    temp_key = f"{USERNAMES_KEY}:rebuild:{uuid.uuid4().hex}"
+    db = SessionLocal()
+    try:
+        last_id = db.query(func.max(UserDB.id)).scalar() or 0
+        total = 0
+        batch = []
+        rows = db.query(UserDB.username).filter(UserDB.id <= last_id).execution_options(yield_per=REBUILD_BATCH)
+        for (username,) in rows:
+            batch.append(username)
+            if len(batch) == REBUILD_BATCH:
+                add_usernames(temp_key, batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            add_usernames(temp_key, batch)
+            total += len(batch)
+        if total:
+            redis_client.rename(temp_key, USERNAMES_KEY)
+        else:
+            redis_client.delete(USERNAMES_KEY)
+        # Пользователи, созданные во время пересборки, попали только в старый ключ: добавляем их заново
+        new_usernames = [username for (username,) in db.query(UserDB.username).filter(UserDB.id > last_id)]
+        if new_usernames:
+            add_usernames(USERNAMES_KEY, new_usernames)
+        print(f"Autocomplete rebuilt: {total + len(new_usernames)} usernames")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    rebuild()
@@ -0,0 +1,257 @@
+import zlib
+from typing import Dict, Optional
+
+# brotli и zstandard необязательны: без них доступен только gzip
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+DEFAULT_LEVELS = {"zstd": 3, "br": 4, "gzip": 4}  # Подобраны по bench_compression.py
+# Порядок предпочтения сервера при одинаковом q в Accept-Encoding
+DEFAULT_PREFERENCE = ("zstd", "br", "gzip")
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/x-ndjson", "application/javascript")
+
+def available_encodings() -> list:
+    encodings = ["gzip"]
+    if brotli is not None:
+        encodings.append("br")
+    if zstandard is not None:
+        encodings.append("zstd")
+    return encodings
+
+# Потоковые кодировщики с общим интерфейсом: compress — очередной кусок,
+# flush — отдать всё накопленное (для потоковых ответов), finish — завершить поток
+class GzipEncoder:
+    def __init__(self, level: int):
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31 — формат gzip
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self.compressor.flush(zlib.Z_FINISH)
+
+class BrotliEncoder:
+    def __init__(self, level: int):
+        self.compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self.compressor.flush()
+
+    def finish(self) -> bytes:
+        return self.compressor.finish()
+
+class ZstdEncoder:
+    def __init__(self, level: int):
+        self.compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self.compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self.compressor.flush()
+
+ENCODERS = {"gzip": GzipEncoder, "br": BrotliEncoder, "zstd": ZstdEncoder}
+
+def compress(encoding: str, level: int, data: bytes) -> bytes:
+    encoder = ENCODERS[encoding](level)
+    return encoder.compress(data) + encoder.finish()
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    accepted = {}
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name:
+            accepted[name.strip().lower()] = q
+    return accepted
+
+def etag_with_coding(etag: bytes, encoding: str) -> bytes:
+    # У сжатого представления свой сильный ETag: "abc" -> "abc-gzip"
+    if not etag.endswith(b'"'):
+        return etag
+    return etag[:-1] + b"-" + encoding.encode() + b'"'
+
+def strip_etag_coding(header: bytes, encoding: str):
+    # If-None-Match приходит с ETag сжатого представления; приложение знает только исходный.
+    # Суффикс снимается только у выбранной сейчас кодировки: копию в другой кодировке
+    # клиент, возможно, уже не сможет распаковать, и 304 на неё отвечать нельзя.
+    # Возвращает заголовок без суффиксов и множество исходных ETag, у которых он был
+    suffix = b"-" + encoding.encode() + b'"'
+    tags, stripped = [], set()
+    for tag in header.split(b","):
+        tag = tag.strip()
+        if tag.endswith(suffix):
+            tag = tag[:-len(suffix)] + b'"'
+            stripped.add(tag)
+        tags.append(tag)
+    return b", ".join(tags), stripped
+
+# ASGI-middleware сжатия ответов. Кодировка выбирается по Accept-Encoding (наибольший q,
+# затем порядок preference), ответы меньше minimum_size и несжимаемые типы отдаются как есть.
+# Уровни задаются по кодировкам и могут быть переопределены для префикса пути
+# (route_levels: префикс -> {кодировка: уровень} или None, чтобы не сжимать).
+# Тело копится, пока не наберётся minimum_size байт или ответ не закончится: промежуточные
+# middleware (BaseHTTPMiddleware) присылают даже короткие ответы кусками с more_body=True.
+# Потоковые ответы дальше сжимаются по кускам: каждый кусок сразу отправляется клиенту
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = 1024, levels: Optional[dict] = None,
+                 route_levels: Optional[dict] = None, preference: tuple = DEFAULT_PREFERENCE):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.levels = dict(DEFAULT_LEVELS, **(levels or {}))
+        # Длинные префиксы проверяются первыми
+        self.route_levels = sorted((route_levels or {}).items(), key=lambda item: -len(item[0]))
+        available = available_encodings()
+        self.preference = [encoding for encoding in preference if encoding in available]
+
+    def levels_for(self, path: str) -> Optional[dict]:
+        for prefix, levels in self.route_levels:
+            if path.startswith(prefix):
+                return None if levels is None else dict(self.levels, **levels)
+        return self.levels
+
+    def choose_encoding(self, header: str) -> Optional[str]:
+        accepted = parse_accept_encoding(header)
+        best, best_q = None, 0.0
+        for encoding in self.preference:
+            q = accepted.get(encoding, accepted.get("*", 0.0))
+            if q > best_q:
+                best, best_q = encoding, q
+        return best
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        levels = self.levels_for(scope["path"])
+        if levels is None:
+            await self.app(scope, receive, send)
+            return
+        encoding = None
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                encoding = self.choose_encoding(value.decode("latin-1"))
+                break
+        stripped_etags = set()
+        if encoding is not None:
+            headers = []
+            for name, value in scope["headers"]:
+                if name == b"if-none-match":
+                    value, stripped_etags = strip_etag_coding(value, encoding)
+                headers.append((name, value))
+            scope = dict(scope, headers=headers)
+        level = levels[encoding] if encoding else None
+        responder = CompressingResponder(send, encoding, level, self.minimum_size, stripped_etags)
+        await self.app(scope, receive, responder.send)
+
+class CompressingResponder:
+    def __init__(self, send, encoding: Optional[str], level: Optional[int], minimum_size: int,
+                 stripped_etags: Optional[set] = None):
+        self.downstream = send
+        self.encoding = encoding
+        self.level = level
+        self.minimum_size = minimum_size
+        self.stripped_etags = stripped_etags or set()
+        self.start_message = None
+        self.buffer = []
+        self.buffered = 0
+        self.encoder = None
+        self.passthrough = False
+
+    def start(self, message):
+        headers = []
+        vary = False
+        self.passthrough = self.encoding is None
+        for name, value in message.get("headers", []):
+            name = name.lower()
+            if name == b"vary":
+                vary = vary or b"accept-encoding" in value.lower() or value.strip() == b"*"
+            elif name == b"content-encoding":
+                self.passthrough = True
+            elif name == b"content-type":
+                self.passthrough = self.passthrough or not value.decode("latin-1").startswith(COMPRESSIBLE_TYPES)
+            elif name == b"etag" and message["status"] == 304 and value in self.stripped_etags:
+                # 304 подтверждает то представление, ETag которого прислал клиент
+                value = etag_with_coding(value, self.encoding)
+            headers.append((name, value))
+        if not vary:
+            # Ответ по этому адресу зависит от Accept-Encoding — это нужно знать кешам,
+            # даже если именно этот ответ не сжат
+            headers.append((b"vary", b"Accept-Encoding"))
+        self.start_message = dict(message, headers=headers)
+        if message["status"] in (204, 304):
+            self.passthrough = True
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            self.start(message)
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.flush_start()
+            await self.downstream(message)
+            return
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.encoder is None:
+            self.buffer.append(body)
+            self.buffered += len(body)
+            if more_body and self.buffered < self.minimum_size:
+                return  # Ещё не ясно, стоит ли сжимать
+            body = b"".join(self.buffer)
+            self.buffer = []
+            if not more_body and len(body) < self.minimum_size:
+                self.passthrough = True
+                await self.flush_start()
+                await self.downstream({"type": "http.response.body", "body": body})
+                return
+            self.encoder = ENCODERS[self.encoding](self.level)
+            headers = []
+            for name, value in self.start_message["headers"]:
+                if name == b"content-length":
+                    continue
+                if name == b"etag":
+                    value = etag_with_coding(value, self.encoding)
+                headers.append((name, value))
+            headers.append((b"content-encoding", self.encoding.encode()))
+            if not more_body:
+                compressed = self.encoder.compress(body) + self.encoder.finish()
+                headers.append((b"content-length", str(len(compressed)).encode()))
+                self.start_message["headers"] = headers
+                await self.flush_start()
+                await self.downstream({"type": "http.response.body", "body": compressed})
+                return
+            self.start_message["headers"] = headers
+            await self.flush_start()
+        if more_body:
+            data = self.encoder.compress(body) + self.encoder.flush()
+        else:
+            data = self.encoder.compress(body) + self.encoder.finish()
+        await self.downstream({"type": "http.response.body", "body": data, "more_body": more_body})
+
+    async def flush_start(self):
+        if self.start_message is not None:
+            await self.downstream(self.start_message)
+            self.start_message = None
@@ -0,0 +1,118 @@
+import hashlib
+import math
+import threading
+import time
+from redis import RedisError
+
+REVOKED_KEY = "revoked:{jti}"
+REVOKED_INDEX = "revoked:index"  # ZSET jti -> время истечения токена, для пересборки фильтра
+REVOKED_CHANNEL = "revoked"
+
+# Отзыв одним скриптом: ключ, запись в индексе и сообщение появляются вместе.
+# Иначе при сбое после SET NX jti не попал бы ни в фильтры других воркеров, ни в индекс,
+# по которому resync их пересобирает
+REVOKE_SCRIPT = """
+if not redis.call('SET', KEYS[1], 1, 'NX', 'EX', ARGV[2]) then
+    return 0
+end
+redis.call('ZADD', KEYS[2], ARGV[3], ARGV[1])
+redis.call('PUBLISH', ARGV[4], ARGV[1])
+return 1
+"""
+
+# Фильтр Блума на bytearray: k позиций из одного blake2b (двойное хеширование)
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item: str):
+        for position in self.positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(item))
+
+# Список отозванных токенов: ключ revoked:<jti> в Redis живёт до истечения токена, перед ним
+# фильтр Блума в памяти процесса. Обычный случай (токен не отозван) проверяется без обращения
+# к Redis; при попадании в фильтр отзыв подтверждается в Redis (ложные срабатывания, истёкшие jti).
+# Фильтр пополняется через pub/sub и периодически пересобирается из индекса: это покрывает
+# потерянные сообщения и убирает истёкшие записи
+class RevocationList:
+    def __init__(self, redis_client, capacity: int = 100000, error_rate: float = 0.001, resync_interval: float = 60):
+        self.redis = redis_client
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.resync_interval = resync_interval
+        self.filter = BloomFilter(capacity, error_rate)
+        self.synced = False
+        self.revoke_script = redis_client.register_script(REVOKE_SCRIPT)
+
+    def revoke(self, jti: str, expires_at: float) -> bool:
+        # SET NX: True только у того вызова, который отозвал токен первым, поэтому
+        # refresh-токен можно обменять ровно один раз даже при одновременных запросах
+        ttl = math.ceil(expires_at - time.time())
+        if ttl <= 0:
+            return False
+        revoked = self.revoke_script(
+            keys=[REVOKED_KEY.format(jti=jti), REVOKED_INDEX], args=[jti, ttl, expires_at, REVOKED_CHANNEL]
+        )
+        if not revoked:
+            return False
+        self.filter.add(jti)
+        return True
+
+    def is_revoked(self, jti: str) -> bool:
+        if self.synced and jti not in self.filter:
+            return False
+        # Фильтр ещё не загружен или сработал: спрашиваем Redis. Если Redis недоступен,
+        # ошибка уходит вызывающему: отозванный токен не должен пройти
+        return bool(self.redis.exists(REVOKED_KEY.format(jti=jti)))
+
+    def resync(self):
+        now = time.time()
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.zremrangebyscore(REVOKED_INDEX, "-inf", now)
+        pipe.zrangebyscore(REVOKED_INDEX, now, "+inf")
+        _, jtis = pipe.execute()
+        capacity = max(self.capacity, len(jtis) * 2)
+        bloom = BloomFilter(capacity, self.error_rate)
+        for jti in jtis:
+            bloom.add(jti.decode())
+        # Отзывы, опубликованные во время пересборки, ждут в подписке и будут добавлены
+        # в новый фильтр тем же потоком сразу после замены
+        self.filter = bloom
+        self.synced = True
+
+    def listen(self):
+        while True:
+            pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(REVOKED_CHANNEL)
+                # Подписка до пересборки: отзывы в промежутке не теряются
+                self.resync()
+                resynced_at = time.monotonic()
+                while True:
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is not None:
+                        self.filter.add(message["data"].decode())
+                    if time.monotonic() - resynced_at >= self.resync_interval:
+                        self.resync()
+                        resynced_at = time.monotonic()
+            except RedisError as e:
+                # Пока нет связи, фильтр может отстать: проверяем каждый токен в Redis
+                self.synced = False
+                print(f"Revocation list sync error: {e}")
+                time.sleep(1)
+            finally:
+                pubsub.close()
+
+    def start(self):
+        threading.Thread(target=self.listen, daemon=True).start()